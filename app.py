@@ -1,11 +1,26 @@
 import os
 import json
+import base64
+import binascii
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from flask import Flask, request, jsonify, render_template, session, redirect, url_for, send_from_directory
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from flask import Flask, abort, request, jsonify, render_template, session, redirect, url_for, send_from_directory
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, insert, select
 from werkzeug.utils import secure_filename
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
+import numba
+import numpy as np
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
@@ -14,6 +29,13 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(EXPORT_FOLDER, exist_ok=True)
 
 ALLOWED_EXT = {"csv", "xlsx", "xls"}
+DF_CACHE_MAX = 8
+CHART_TYPE_SQL = "json_extract(config_json, '$[0].type')"
+CHART_MAX_POINTS = 2000  # default cap on points returned per chart
+CSV_STREAM_BYTES = 256 << 20  # CSVs above this are filtered chunk by chunk
+CSV_CHUNK_ROWS = 100_000
+EXECUTOR = ThreadPoolExecutor(max_workers=4)
+PH = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
 
 app = Flask(__name__)
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
@@ -21,10 +43,24 @@ app.config["EXPORT_FOLDER"] = EXPORT_FOLDER
 app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(BASE_DIR, "app.db")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["SECRET_KEY"] = "replace-this-with-a-secure-random-secret"
+# let nginx/Apache stream files from disk; only enable behind a server that handles X-Sendfile
+app.use_x_sendfile = os.environ.get("USE_X_SENDFILE") == "1"
 
 db = SQLAlchemy(app)
 
 
+# WAL lets readers run alongside a writer instead of queueing behind its lock
+with app.app_context():
+    @event.listens_for(db.engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _):
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.execute("PRAGMA cache_size=-20000")  # 20MB page cache
+        cur.close()
+
+
 # --------------------
 # DB Models
 # --------------------
@@ -36,31 +72,333 @@ class User(db.Model):
 
 
 class Project(db.Model):
+    # serves list_projects' owner filter + created_at ordering straight from the index
+    __table_args__ = (
+        db.Index("ix_project_owner_created", "owner_id", "created_at"),
+        db.Index("ix_project_owner_chart_type", "owner_id", "chart_type"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     owner_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     name = db.Column(db.String(200), nullable=False)
     file_path = db.Column(db.String(500), nullable=False)
     config_json = db.Column(db.Text, nullable=False)  # stores chart configs & filters
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # type of the first chart, computed by SQLite JSON1 so listings never parse config_json
+    chart_type = db.Column(db.Text, db.Computed(CHART_TYPE_SQL, persisted=False))
 
 
 # --------------------
 # Helpers
 # --------------------
+def ojson(obj, status=200):
+    # orjson encodes NumPy arrays directly (NaN -> null); str() covers timestamps etc.
+    body = orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY, default=str)
+    return app.response_class(body, status=status, mimetype="application/json")
+
+
+def verify_password(user, password):
+    # argon2 for new hashes; older werkzeug hashes still verify and are upgraded on login
+    if user.password_hash.startswith("$argon2"):
+        try:
+            PH.verify(user.password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+        if not PH.check_needs_rehash(user.password_hash):
+            return True
+    elif not check_password_hash(user.password_hash, password):
+        return False
+    user.password_hash = PH.hash(password)
+    db.session.commit()
+    return True
+
+
 def allowed_file(filename):
     ext = filename.rsplit(".", 1)[-1].lower()
     return "." in filename and ext in ALLOWED_EXT
 
 
-def read_table(filepath):
+# names of uploaded tables; filled at boot and on every upload
+VALID_UPLOADS = {n for n in os.listdir(app.config["UPLOAD_FOLDER"]) if allowed_file(n)}
+
+
+def is_upload(filename):
+    # set lookup first; a plain file name saved by another worker is checked on disk once
+    if not isinstance(filename, str):
+        return False
+    if filename in VALID_UPLOADS:
+        return True
+    if os.path.basename(filename) != filename or not allowed_file(filename):
+        return False
+    if os.path.isfile(os.path.join(app.config["UPLOAD_FOLDER"], filename)):
+        VALID_UPLOADS.add(filename)
+        return True
+    return False
+
+
+def _parquet_path(path):
+    # columnar copy written next to each upload
+    return path + ".parquet"
+
+
+def _meta_path(path):
+    # {columns, rows} sidecar so get_columns never has to open the table
+    return path + ".meta"
+
+
+# parsed DataFrames keyed by (path, mtime, columns); most recently used last
+_DF_CACHE = OrderedDict()
+
+
+def _parse_table(filepath, columns=None):
     ext = filepath.rsplit(".", 1)[-1].lower()
-    if ext in ("xls", "xlsx"):
-        df = pd.read_excel(filepath)
+    if ext == "parquet":
+        df = pd.read_parquet(filepath, columns=columns)
+    elif ext in ("xls", "xlsx"):
+        # Rust-backed reader; handles both xlsx and legacy xls
+        df = pd.read_excel(filepath, usecols=columns, engine="calamine")
     else:
-        df = pd.read_csv(filepath)
+        df = _read_csv(filepath, columns)
     return df
 
 
+def _read_csv(filepath, columns=None):
+    # multithreaded Arrow parser; pandas handles whatever Arrow rejects.
+    # Header names come from pandas (Unnamed: N, a.1 dedup) so they match the preview.
+    names = pd.read_csv(filepath, nrows=0).columns.tolist()
+    read_options = pacsv.ReadOptions(use_threads=True, block_size=8 << 20, column_names=names, skip_rows=1)
+    try:
+        tbl = pacsv.read_csv(
+            filepath,
+            read_options=read_options,
+            convert_options=pacsv.ConvertOptions(include_columns=columns, strings_can_be_null=True),
+        )
+        # pandas leaves date/time text as strings; re-read any column Arrow made temporal
+        temporal = {f.name: pa.string() for f in tbl.schema if pa.types.is_temporal(f.type)}
+        if temporal:
+            tbl = pacsv.read_csv(
+                filepath,
+                read_options=read_options,
+                convert_options=pacsv.ConvertOptions(
+                    include_columns=columns, strings_can_be_null=True, column_types=temporal
+                ),
+            )
+    except pa.ArrowInvalid:
+        return pd.read_csv(filepath, usecols=columns)
+    return tbl.to_pandas(self_destruct=True, split_blocks=True)
+
+
+def _tmp_path(dest):
+    # sidecars are written beside dest and os.replace'd in, so readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest), prefix=os.path.basename(dest) + ".", suffix=".tmp")
+    os.close(fd)
+    return tmp
+
+
+def _write_parquet(df, path):
+    # keep a columnar copy so later reads only touch the columns they need;
+    # frames pyarrow can't store (mixed-type columns etc.) stay on the original file
+    tmp = _tmp_path(_parquet_path(path))
+    try:
+        df.to_parquet(tmp, compression="zstd")
+        os.replace(tmp, _parquet_path(path))
+    except Exception:
+        os.remove(tmp)
+        return False
+    return True
+
+
+def _drop_sidecars(path):
+    # a re-upload under the same name must not inherit the old file's derived copies
+    for side in (_parquet_path(path), _meta_path(path)):
+        try:
+            os.remove(side)
+        except FileNotFoundError:
+            pass
+
+
+def _write_meta(path, columns, rows):
+    tmp = _tmp_path(_meta_path(path))
+    try:
+        with open(tmp, "w") as f:
+            json.dump({"columns": list(columns), "rows": int(rows)}, f)
+        os.replace(tmp, _meta_path(path))
+    except (OSError, TypeError, ValueError):
+        os.remove(tmp)
+
+
+def _is_big_csv(path):
+    # CSVs too large to load whole are only ever read chunk by chunk
+    return path.rsplit(".", 1)[-1].lower() == "csv" and os.path.getsize(path) > CSV_STREAM_BYTES
+
+
+def _stream_csv_meta(path):
+    # header plus a chunked row count over a single column; memory bounded by CSV_CHUNK_ROWS
+    names = pd.read_csv(path, nrows=0).columns.tolist()
+    rows = 0
+    if names:
+        for chunk in pd.read_csv(path, usecols=[0], chunksize=CSV_CHUNK_ROWS):
+            rows += len(chunk)
+    _write_meta(path, names, rows)
+    return {"columns": names, "rows": rows}
+
+
+def read_table(filepath, columns=None):
+    # prefer the parquet copy when present; fall back to the original upload
+    pq_path = _parquet_path(filepath)
+    source = pq_path if os.path.exists(pq_path) else filepath
+    # callers get a shallow copy so the cached frame is never modified in place
+    key = (source, os.path.getmtime(source), None if columns is None else tuple(columns))
+    df = _DF_CACHE.pop(key, None)
+    if df is None:
+        df = _parse_table(source, columns)
+        if source == filepath and columns is None:
+            # first full parse of an upload: convert it once
+            if _write_parquet(df, filepath):
+                # later reads resolve to the parquet copy; cache the frame under its key
+                key = (pq_path, os.path.getmtime(pq_path), None)
+            _write_meta(filepath, df.columns.tolist(), df.shape[0])
+    _DF_CACHE[key] = df
+    while len(_DF_CACHE) > DF_CACHE_MAX:
+        _DF_CACHE.popitem(last=False)
+    return df.copy(deep=False)
+
+
+def read_table_preview(filepath, n=8):
+    # header + first n rows only, without parsing the whole file
+    # same header handling (Unnamed: N, dedup) as the full read in read_table
+    ext = filepath.rsplit(".", 1)[-1].lower()
+    if ext == "xlsx":
+        # openpyxl's read-only reader stops after nrows; calamine loads the whole sheet first
+        return pd.read_excel(filepath, nrows=n, engine="openpyxl")
+    if ext == "xls":
+        return pd.read_excel(filepath, nrows=n, engine="calamine")
+    return pd.read_csv(filepath, nrows=n)
+
+
+# no fastmath: it assumes no NaNs, and coerced non-numeric cells are NaN.
+# no parallel=True: it's called from concurrent request threads, and numba's
+# fallback workqueue threading layer aborts the process on concurrent use
+@numba.njit(cache=True)
+def range_mask(arr, lo, hi, out):
+    # out[i] stays True only where lo <= arr[i] <= hi (NaN never matches)
+    for i in range(arr.size):
+        v = arr[i]
+        out[i] &= (v >= lo) & (v <= hi)
+
+
+def _text_mask(series, txt):
+    # case-insensitive literal substring match, scanned by Arrow over its string buffers.
+    # Matching runs on pandas' str() of each cell ("2.0", "nan"), so only all-string
+    # columns without nulls go to Arrow untouched; everything else is str()'d first.
+    arr = None
+    if series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+        try:
+            arr = pa.array(series, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            arr = None  # mixed-type object column
+        if arr is not None and (arr.null_count or not (pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type))):
+            arr = None
+    if arr is None:
+        if series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+            # Arrow CSV reads and parquet round-trips give None/NA for missing strings
+            # where pandas' read_csv gave NaN; normalize so they still str() to "nan"
+            series = series.astype(object).where(series.notna(), np.nan)
+        arr = pa.array(series.astype(str))
+    hits = pc.match_substring(arr, txt, ignore_case=True).fill_null(False)
+    return hits.to_numpy(zero_copy_only=False)
+
+
+class FilterError(ValueError):
+    """Chart request that can't be applied to the table (bad filter value, unknown column)."""
+
+
+def _build_mask(df, filters):
+    # one combined boolean mask over all filters
+    mask = np.ones(len(df), dtype=bool)
+    num_cache = {}  # each range column is converted to float only once
+    for col, fconf in filters.items():
+        if col not in df.columns:
+            continue
+        if fconf.get("type") == "range":
+            mn = fconf.get("min")
+            mx = fconf.get("max")
+            if mn is None and mx is None:
+                continue
+            if col not in num_cache:
+                num_cache[col] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+            lo = float(mn) if mn is not None else -np.inf
+            hi = float(mx) if mx is not None else np.inf
+            range_mask(num_cache[col], lo, hi, mask)
+        elif fconf.get("type") == "text":
+            txt = fconf.get("text", "")
+            if txt:
+                mask &= _text_mask(df[col], txt)
+    return mask
+
+
+def apply_mask(df, filters, columns):
+    # only mask building is guarded; read errors surface as they are
+    missing = [c for c in columns if c not in df.columns]
+    if missing:
+        raise FilterError(f"column not found: {', '.join(map(str, missing))}")
+    try:
+        mask = _build_mask(df, filters)
+    except Exception as e:
+        raise FilterError(f"filtering error: {e}") from e
+    return df.loc[mask, columns]
+
+
+@numba.njit(cache=True)
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: indices of `threshold` points that keep the visual shape
+    n = x.size
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    out = np.empty(threshold, dtype=np.int64)
+    out[0] = 0
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # average of the next bucket (NaN y values skipped)
+        start = int((i + 1) * every) + 1
+        end = min(int((i + 2) * every) + 1, n)
+        avg_x = 0.0
+        avg_y = 0.0
+        cnt = 0
+        for j in range(start, end):
+            if not np.isnan(y[j]):
+                avg_x += x[j]
+                avg_y += y[j]
+                cnt += 1
+        if cnt:
+            avg_x /= cnt
+            avg_y /= cnt
+        # pick the point in this bucket forming the largest triangle with a and the average
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        max_area = -1.0
+        pick = lo
+        for j in range(lo, hi):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > max_area:
+                max_area = area
+                pick = j
+        out[i + 1] = pick
+        a = pick
+    out[threshold - 1] = n - 1
+    return out
+
+
+# export writes still in flight, by file name
+_PENDING_EXPORTS = {}
+
+
+def _write_file(path, raw):
+    with open(path, "wb") as f:
+        f.write(raw)
+
+
 # --------------------
 # Routes: Auth (simple)
 # --------------------
@@ -73,12 +411,11 @@ def register():
         return jsonify({"error": "username and password required"}), 400
     if User.query.filter_by(username=username).first():
         return jsonify({"error": "username exists"}), 400
-    u = User(username=username, password_hash=generate_password_hash(password))
-    db.session.add(u)
+    res = db.session.execute(insert(User).values(username=username, password_hash=PH.hash(password)))
     db.session.commit()
-    session["user_id"] = u.id
-    session["username"] = u.username
-    return jsonify({"ok": True, "username": u.username})
+    session["user_id"] = res.inserted_primary_key[0]
+    session["username"] = username
+    return jsonify({"ok": True, "username": username})
 
 
 @app.route("/login", methods=["POST"])
@@ -89,7 +426,7 @@ def login():
     if not username or not password:
         return jsonify({"error": "username and password required"}), 400
     u = User.query.filter_by(username=username).first()
-    if not u or not check_password_hash(u.password_hash, password):
+    if not u or not verify_password(u, password):
         return jsonify({"error": "invalid credentials"}), 400
     session["user_id"] = u.id
     session["username"] = u.username
@@ -124,12 +461,18 @@ def upload_file():
         return jsonify({"error": "unsupported file type"}), 400
     filename = secure_filename(f"{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{f.filename}")
     path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
+    _drop_sidecars(path)
     f.save(path)
+    VALID_UPLOADS.add(filename)
     # quick read to return preview columns & first few rows
     try:
-        df = read_table(path)
+        df = read_table_preview(path)
         cols = df.columns.tolist()
-        preview = df.head(8).fillna("").to_dict(orient="records")
+        head = df.head(8)
+        preview = [
+            {c: ("" if pd.isna(v) else v) for c, v in zip(cols, row)}
+            for row in head.itertuples(index=False, name=None)
+        ]
         return jsonify({"ok": True, "file": filename, "columns": cols, "preview": preview})
     except Exception as e:
         return jsonify({"error": f"unable to read file: {e}"}), 400
@@ -144,16 +487,33 @@ def get_columns():
     filename = data.get("file")
     if not filename:
         return jsonify({"error": "file required"}), 400
+    if not is_upload(filename):
+        return jsonify({"error": "file not found"}), 404
     path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-    if not os.path.exists(path):
+    try:
+        with open(_meta_path(path)) as fh:
+            return jsonify(json.load(fh))
+    except (OSError, ValueError):
+        pass  # legacy upload without a sidecar
+    pq_path = _parquet_path(path)
+    try:
+        if os.path.exists(pq_path):
+            # answered from the parquet footer, no data pages read
+            pf = pq.ParquetFile(pq_path)
+            return jsonify({"columns": pf.schema_arrow.names, "rows": pf.metadata.num_rows})
+        if _is_big_csv(path):
+            return jsonify(_stream_csv_meta(path))
+        df = read_table(path)
+    except FileNotFoundError:
+        # deleted from disk since it was registered
+        VALID_UPLOADS.discard(filename)
         return jsonify({"error": "file not found"}), 404
-    df = read_table(path)
     return jsonify({"columns": df.columns.tolist(), "rows": len(df)})
 
 
 # --------------------
 # Generate filtered chart arrays (applies simple filters before returning arrays)
-# POST json: {file, xcol, ycol, filters:{col:{type:'range'/'text', min, max, text}} }
+# POST json: {file, xcol, ycol, filters:{col:{type:'range'/'text', min, max, text}}, max_points}
 # --------------------
 @app.route("/api/generate_chart", methods=["POST"])
 def generate_chart():
@@ -161,36 +521,58 @@ def generate_chart():
     filename = data.get("file")
     xcol = data.get("xcol")
     ycol = data.get("ycol")
-    filters = data.get("filters", {})
+    filters = data.get("filters") or {}
     if not filename or not xcol or not ycol:
         return jsonify({"error": "file,xcol,ycol required"}), 400
-    path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-    if not os.path.exists(path):
+    if not isinstance(filters, dict):
+        return jsonify({"error": "filtering error: filters must be an object"}), 400
+    try:
+        max_points = int(data.get("max_points", CHART_MAX_POINTS))
+    except (TypeError, ValueError):
+        return jsonify({"error": "max_points must be an integer"}), 400
+    if not is_upload(filename):
         return jsonify({"error": "file not found"}), 404
-    df = read_table(path)
-    # Apply filters
+    path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
+    out_cols = list(dict.fromkeys([xcol, ycol]))
+    pq_path = _parquet_path(path)
     try:
-        for col, fconf in filters.items():
-            if col not in df.columns:
-                continue
-            if fconf.get("type") == "range":
-                mn = fconf.get("min")
-                mx = fconf.get("max")
-                if mn is not None:
-                    df = df[df[col].astype(float) >= float(mn)]
-                if mx is not None:
-                    df = df[df[col].astype(float) <= float(mx)]
-            elif fconf.get("type") == "text":
-                txt = fconf.get("text", "")
-                if txt:
-                    df = df[df[col].astype(str).str.contains(txt, case=False, na=False)]
-    except Exception as e:
-        # If filter failed due to conversion, skip filter but warn
-        return jsonify({"error": f"filtering error: {e}"}), 400
-    # Prepare arrays
-    xvals = df[xcol].astype(str).tolist()
-    yvals = df[ycol].tolist()
-    return jsonify({"x": xvals, "y": yvals, "rows": len(df)})
+        if os.path.exists(pq_path):
+            # only load the columns this chart actually touches
+            names = pq.ParquetFile(pq_path).schema_arrow.names
+            needed = [c for c in dict.fromkeys([*out_cols, *filters]) if c in names]
+            df = apply_mask(read_table(path, columns=needed), filters, out_cols)
+        elif _is_big_csv(path):
+            # too big to hold whole: filter chunk by chunk and keep only matching rows
+            names = pd.read_csv(path, nrows=0).columns
+            needed = [c for c in dict.fromkeys([*out_cols, *filters]) if c in names]
+            reader = pd.read_csv(path, usecols=needed, chunksize=CSV_CHUNK_ROWS)
+            kept = [apply_mask(chunk, filters, out_cols) for chunk in reader]
+            df = pd.concat(kept, ignore_index=True) if kept else pd.DataFrame(columns=out_cols)
+        else:
+            df = apply_mask(read_table(path), filters, out_cols)
+    except FilterError as e:
+        return jsonify({"error": str(e)}), 400
+    except FileNotFoundError:
+        # deleted from disk since it was registered
+        VALID_UPLOADS.discard(filename)
+        return jsonify({"error": "file not found"}), 404
+    rows = len(df)
+    # Downsample to what a canvas can show; categorical x falls back to row position
+    if rows > max_points and pd.api.types.is_numeric_dtype(df[ycol]):
+        y = df[ycol].to_numpy(dtype=float, na_value=np.nan)
+        x = pd.to_numeric(df[xcol], errors="coerce")
+        x = np.arange(rows, dtype=float) if x.isna().any() else x.to_numpy(dtype=float)
+        df = df.iloc[lttb(x, y, max_points)]
+    # Prepare arrays: x is dictionary-encoded (unique labels + one int code per point)
+    xcat = df[xcol].astype("category").cat
+    xdict = xcat.categories.astype(str).tolist()
+    xcodes = np.ascontiguousarray(xcat.codes.to_numpy())  # -1 marks a missing x
+    if pd.api.types.is_numeric_dtype(df[ycol]):
+        # handed to orjson as-is, no per-value Python objects
+        yvals = np.ascontiguousarray(df[ycol].to_numpy())
+    else:
+        yvals = df[ycol].tolist()
+    return ojson({"x_dict": xdict, "x_codes": xcodes, "y": yvals, "rows": rows})
 
 
 # --------------------
@@ -208,26 +590,45 @@ def save_project():
     if not filename:
         return jsonify({"error": "file required"}), 400
     # verify file exists
-    path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-    if not os.path.exists(path):
+    if not is_upload(filename):
         return jsonify({"error": "file not found"}), 404
-    p = Project(owner_id=session["user_id"], name=name, file_path=filename, config_json=json.dumps(config))
-    db.session.add(p)
+    # NaN/Infinity aren't valid JSON; JSON1 would reject them when computing chart_type
+    try:
+        config_json = json.dumps(config, allow_nan=False)
+    except ValueError:
+        return jsonify({"error": "config must not contain NaN or Infinity"}), 400
+    # plain INSERT, no ORM unit-of-work for a single row
+    stmt = insert(Project).values(owner_id=session["user_id"], name=name, file_path=filename, config_json=config_json)
+    res = db.session.execute(stmt)
     db.session.commit()
-    return jsonify({"ok": True, "project_id": p.id})
+    return jsonify({"ok": True, "project_id": res.inserted_primary_key[0]})
 
 
 # --------------------
-# List projects for user
+# List projects for user (optional ?chart_type= narrows by the first chart's type)
 # --------------------
 @app.route("/api/list_projects", methods=["GET"])
 def list_projects():
     if "user_id" not in session:
         return jsonify({"error": "authentication required"}), 401
-    projs = Project.query.filter_by(owner_id=session["user_id"]).order_by(Project.created_at.desc()).all()
+    # selects only the listed columns and reads plain rows, skipping ORM objects
+    stmt = (
+        select(Project.id, Project.name, Project.file_path, Project.chart_type, Project.created_at)
+        .where(Project.owner_id == session["user_id"])
+        .order_by(Project.created_at.desc())
+    )
+    chart_type = request.args.get("chart_type")
+    if chart_type:
+        stmt = stmt.where(Project.chart_type == chart_type)
     out = []
-    for p in projs:
-        out.append({"id": p.id, "name": p.name, "file": p.file_path, "created_at": p.created_at.isoformat()})
+    for p in db.session.execute(stmt):
+        out.append({
+            "id": p.id,
+            "name": p.name,
+            "file": p.file_path,
+            "chart_type": p.chart_type,
+            "created_at": p.created_at.isoformat()
+        })
     return jsonify({"projects": out})
 
 
@@ -238,14 +639,15 @@ def list_projects():
 def load_project(proj_id):
     if "user_id" not in session:
         return jsonify({"error": "authentication required"}), 401
-    p = Project.query.get(proj_id)
-    if not p or p.owner_id != session["user_id"]:
+    p = Project.query.filter_by(id=proj_id, owner_id=session["user_id"]).first()
+    if not p:
         return jsonify({"error": "project not found or access denied"}), 404
-    return jsonify({
+    # config_json is already JSON text; embed it as-is instead of parsing and re-encoding
+    return ojson({
         "id": p.id,
         "name": p.name,
         "file": p.file_path,
-        "config": json.loads(p.config_json),
+        "config": orjson.Fragment(p.config_json),
         "created_at": p.created_at.isoformat()
     })
 
@@ -261,20 +663,42 @@ def save_png():
     if not dataurl:
         return jsonify({"error": "dataURL required"}), 400
     # dataURL looks like "data:image/png;base64,AAAA..."
-    header, b64 = dataurl.split(",", 1)
-    import base64
-    raw = base64.b64decode(b64)
+    comma = dataurl.find(",")
+    if comma < 0:
+        return jsonify({"error": "invalid dataURL"}), 400
+    # decoding stays on the request thread so bad payloads get a 400
+    try:
+        raw = base64.b64decode(dataurl[comma + 1:])
+    except binascii.Error:
+        return jsonify({"error": "invalid dataURL"}), 400
     safe_name = secure_filename(name)
+    if not safe_name:
+        return jsonify({"error": "invalid file name"}), 400
     path = os.path.join(app.config["EXPORT_FOLDER"], safe_name)
-    with open(path, "wb") as f:
-        f.write(raw)
+    # write off the request thread; serve_export waits on it if fetched early
+    fut = EXECUTOR.submit(_write_file, path, raw)
+    _PENDING_EXPORTS[safe_name] = fut
+
+    def _done(done):
+        if done.exception() is not None:
+            app.logger.error("writing export %s failed: %s", safe_name, done.exception())
+        # a newer save under the same name may have replaced this entry
+        if _PENDING_EXPORTS.get(safe_name) is done:
+            _PENDING_EXPORTS.pop(safe_name, None)
+
+    fut.add_done_callback(_done)
     # return a path that can be retrieved by /exports/<filename>
     return jsonify({"ok": True, "url": f"/exports/{safe_name}"})
 
 
 @app.route("/exports/<path:filename>")
 def serve_export(filename):
-    return send_from_directory(app.config["EXPORT_FOLDER"], filename, as_attachment=False)
+    pending = _PENDING_EXPORTS.get(filename)
+    if pending is not None:
+        # wait for the write; if it failed (already logged) the file is missing and this 404s
+        pending.exception()
+    # export names can be reused, so clients revalidate via ETag (304) instead of caching blindly
+    return send_from_directory(app.config["EXPORT_FOLDER"], filename, as_attachment=False, conditional=True)
 
 
 # --------------------
@@ -282,13 +706,30 @@ def serve_export(filename):
 # --------------------
 @app.route("/uploads/<path:filename>")
 def serve_upload(filename):
-    return send_from_directory(app.config["UPLOAD_FOLDER"], filename, as_attachment=False)
+    if not is_upload(filename):
+        abort(404)
+    # a re-upload within the same second overwrites the file, so revalidate via ETag (304)
+    return send_from_directory(app.config["UPLOAD_FOLDER"], filename, as_attachment=False, conditional=True)
 
 
 # --------------------
 # Bootstrap DB & run
 # --------------------
+def init_db():
+    db.create_all()
+    # create_all skips tables that already exist, so bring old DBs up to the current model
+    with db.engine.begin() as conn:
+        cols = {row[1] for row in conn.exec_driver_sql("PRAGMA table_xinfo(project)")}
+        if "chart_type" not in cols:
+            conn.exec_driver_sql(f"ALTER TABLE project ADD COLUMN chart_type TEXT GENERATED ALWAYS AS ({CHART_TYPE_SQL}) VIRTUAL")
+    for idx in Project.__table__.indexes:
+        idx.create(db.engine, checkfirst=True)
+
+
+# runs on import so flask run / gunicorn / test clients also get the current schema
+with app.app_context():
+    init_db()
+
+
 if __name__ == "__main__":
-    with app.app_context():
-        db.create_all()
     app.run(debug=True, port=5000)